@@ -1,11 +1,15 @@
 """Configuration management for Gmail MCP server."""
 
+import functools
 import os
 from dataclasses import dataclass
 from pathlib import Path
 
+# Token cache location used when GMAIL_MCP_TOKEN_PATH is not set
+DEFAULT_TOKEN_PATH = Path.home() / ".config" / "gmail-mcp" / "token.json"
 
-@dataclass
+
+@dataclass(frozen=True)
 class Config:
     """Configuration for Gmail MCP server.
 
@@ -21,6 +25,9 @@ class Config:
     def from_environment(cls) -> "Config":
         """Create configuration from environment variables.
 
+        The environment is read once per process; later calls return the
+        same instance.
+
         Environment Variables:
             GMAIL_MCP_CREDENTIALS_PATH: Required. Path to OAuth credentials JSON.
             GMAIL_MCP_TOKEN_PATH: Optional. Path to token cache file.
@@ -29,22 +36,25 @@ class Config:
         Raises:
             ValueError: If required environment variables are not set.
         """
-        credentials_path_str = os.environ.get("GMAIL_MCP_CREDENTIALS_PATH")
-        if not credentials_path_str:
-            raise ValueError(
-                "GMAIL_MCP_CREDENTIALS_PATH environment variable is required. "
-                "Set it to the path of your Google OAuth credentials JSON file."
-            )
-
-        credentials_path = Path(credentials_path_str).expanduser()
-
-        token_path_str = os.environ.get(
-            "GMAIL_MCP_TOKEN_PATH",
-            str(Path.home() / ".config" / "gmail-mcp" / "token.json"),
-        )
-        token_path = Path(token_path_str).expanduser()
+        return _load_config()
+
 
-        return cls(
-            credentials_path=credentials_path,
-            token_path=token_path,
+@functools.cache
+def _load_config() -> Config:
+    """Load configuration from environment variables."""
+    credentials_path_str = os.environ.get("GMAIL_MCP_CREDENTIALS_PATH")
+    if not credentials_path_str:
+        raise ValueError(
+            "GMAIL_MCP_CREDENTIALS_PATH environment variable is required. "
+            "Set it to the path of your Google OAuth credentials JSON file."
         )
+
+    credentials_path = Path(credentials_path_str).expanduser()
+
+    token_path_str = os.environ.get("GMAIL_MCP_TOKEN_PATH")
+    token_path = Path(token_path_str).expanduser() if token_path_str else DEFAULT_TOKEN_PATH
+
+    return Config(
+        credentials_path=credentials_path,
+        token_path=token_path,
+    )
@@ -1,18 +1,27 @@
 """Gmail API client with OAuth authentication."""
 
-import base64
+import binascii
+import codecs
 import logging
+import math
+import os
+import stat
 import sys
-from email.utils import parsedate_to_datetime
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+# The Google auth and discovery libraries are slow to import, so they are
+# imported where used to keep server startup and --help fast
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
 # Configure logging to stderr (critical for STDIO transport)
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +33,44 @@ logger = logging.getLogger(__name__)
 # Gmail API scope for full access (needed to archive/modify)
 SCOPES = ["https://www.googleapis.com/auth/gmail.modify"]
 
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_LEEWAY = timedelta(seconds=300)
+
+# Wait this long before retrying a failed proactive refresh of a still-valid token
+TOKEN_REFRESH_RETRY_INTERVAL = 30
+
+# Maximum number of message IDs accepted by a single batchModify call
+BATCH_MODIFY_LIMIT = 1000
+
+# Maximum number of requests per batch; Gmail rate-limits larger batches
+MAX_BATCH_SIZE = 50
+
+# Seconds to wait before retrying messages that failed in a batch
+BATCH_RETRY_DELAY = 1.0
+
+# batchModify errors caused by specific message IDs, worth retrying per message
+PER_MESSAGE_ERROR_STATUSES = frozenset({400, 404})
+
+# Headers requested for list/search results (format="metadata")
+METADATA_HEADERS = ["From", "To", "Subject"]
+
+# Lower-cased header names looked up when parsing message details
+HEADER_NAMES = tuple(name.lower() for name in METADATA_HEADERS)
+
+# Maximum number of parsed messages kept in memory by GmailClient
+MESSAGE_CACHE_SIZE = 256
+
+# Message bodies are truncated to this many characters
+MAX_BODY_CHARS = 5000
+
+# Base64 characters decoded per body: UTF-8 uses up to 4 bytes per character
+# and every 4 base64 characters encode 3 bytes, so this always yields at least
+# MAX_BODY_CHARS characters and stays a multiple of 4
+MAX_BODY_BASE64_CHARS = math.ceil(MAX_BODY_CHARS * 4 / 3) * 4
+
+# Maps the base64url alphabet onto standard base64 for binascii
+_URL_SAFE_TRANS = bytes.maketrans(b"-_", b"+/")
+
 
 class AuthenticationRequiredError(Exception):
     """Raised when OAuth authentication is required but not available."""
@@ -35,7 +82,7 @@ def get_credentials(
     credentials_path: Path,
     token_path: Path,
     interactive: bool = False,
-) -> Credentials:
+) -> "Credentials":
     """Get valid OAuth credentials.
 
     For MCP server mode (interactive=False): Only loads cached tokens,
@@ -55,15 +102,10 @@ def get_credentials(
         AuthenticationRequiredError: If auth needed but not in interactive mode.
         FileNotFoundError: If credentials file doesn't exist.
     """
-    creds = None
+    from google.auth.transport.requests import Request
 
     # Check for existing cached token
-    if token_path.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
-            logger.info("Loaded cached credentials from %s", token_path)
-        except Exception as e:
-            logger.warning("Failed to load cached credentials: %s", e)
+    creds = _load_token(token_path)
 
     # If we have valid credentials, return them
     if creds and creds.valid:
@@ -93,6 +135,8 @@ def get_credentials(
         )
 
     # Interactive browser flow
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     logger.info("Starting OAuth flow...")
     flow = InstalledAppFlow.from_client_secrets_file(str(credentials_path), SCOPES)
     creds = flow.run_local_server(port=0)
@@ -101,38 +145,217 @@ def get_credentials(
     return creds
 
 
-def _save_token(creds: Credentials, token_path: Path) -> None:
-    """Save credentials to token file."""
+def _load_token(token_path: Path) -> "Credentials | None":
+    """Load cached credentials from token file, if present and readable."""
+    from google.oauth2.credentials import Credentials
+
+    if not token_path.exists():
+        return None
+
+    try:
+        creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
+        logger.info("Loaded cached credentials from %s", token_path)
+        return creds
+    except Exception as e:
+        logger.warning("Failed to load cached credentials: %s", e)
+        return None
+
+
+def _save_token(creds: "Credentials", token_path: Path) -> None:
+    """Save credentials to token file.
+
+    Writes to a uniquely named temporary file first so a crash mid-write
+    never leaves a truncated token file behind, and concurrent writers never
+    share a temporary file. A new token file is created owner-only (0600);
+    an existing one keeps its mode.
+    """
     token_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(token_path, "w") as token_file:
-        token_file.write(creds.to_json())
+    fd, tmp_name = tempfile.mkstemp(dir=token_path.parent, prefix=token_path.name)
+    try:
+        with os.fdopen(fd, "w") as token_file:
+            token_file.write(creds.to_json())
+            token_file.flush()
+            os.fsync(token_file.fileno())
+        if token_path.exists():
+            os.chmod(tmp_name, stat.S_IMODE(token_path.stat().st_mode))
+        os.replace(tmp_name, token_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _decode_body(data: str) -> str:
+    """Decode a base64url message body, truncated to MAX_BODY_CHARS.
+
+    Missing "=" padding is restored, so unpadded bodies decode too. A
+    multi-byte character cut off by the truncation is dropped rather than
+    decoded as U+FFFD.
+    """
+    encoded = data[:MAX_BODY_BASE64_CHARS].encode("ascii")
+    padding = b"=" * (-len(encoded) % 4)
+    body = binascii.a2b_base64(encoded.translate(_URL_SAFE_TRANS) + padding)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    return decoder.decode(body, final=False)[:MAX_BODY_CHARS]
+
+
+class TokenCache:
+    """In-memory OAuth credentials cache with write-through to the token file.
+
+    Credentials are loaded once, refreshed proactively shortly before they
+    expire, and persisted whenever their access token changes - including
+    refreshes performed implicitly by the Gmail API client. All access goes
+    through one lock, so concurrent callers trigger at most one refresh.
+    """
+
+    def __init__(self, credentials_path: Path, token_path: Path) -> None:
+        """Initialize token cache.
+
+        Args:
+            credentials_path: Path to OAuth credentials JSON.
+            token_path: Path to token cache file.
+        """
+        self.credentials_path = credentials_path
+        self.token_path = token_path
+        self._creds: Credentials | None = None
+        self._saved_token: str | None = None
+        self._next_refresh_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, interactive: bool = False) -> "Credentials":
+        """Get valid credentials, loading or refreshing them as needed.
+
+        Args:
+            interactive: If True, allow browser-based OAuth flow on first load.
+
+        Returns:
+            Valid Google OAuth credentials.
+
+        Raises:
+            AuthenticationRequiredError: If auth needed but not in interactive mode.
+        """
+        with self._lock:
+            if self._creds is None:
+                self._creds = get_credentials(
+                    self.credentials_path,
+                    self.token_path,
+                    interactive=interactive,
+                )
+                self._saved_token = self._creds.token
+
+            if self._expires_soon() and (
+                not self._creds.valid or time.monotonic() >= self._next_refresh_attempt
+            ):
+                self._refresh()
+
+            if self._creds.token != self._saved_token:
+                _save_token(self._creds, self.token_path)
+                self._saved_token = self._creds.token
+                logger.info("Saved refreshed credentials to %s", self.token_path)
+
+            return self._creds
+
+    def _expires_soon(self) -> bool:
+        """Check whether the cached credentials expire within the leeway."""
+        if not self._creds.valid:
+            return True
+        if self._creds.expiry is None:
+            return False
+        now = datetime.now(UTC).replace(tzinfo=None)
+        return self._creds.expiry - now < TOKEN_REFRESH_LEEWAY
+
+    def _refresh(self) -> None:
+        """Refresh the cached credentials ahead of expiry."""
+        if not self._creds.refresh_token:
+            raise AuthenticationRequiredError(
+                "Gmail authentication required. Run: uvx gmail-mcp --setup"
+            )
+
+        from google.auth.transport.requests import Request
+
+        try:
+            self._creds.refresh(Request())
+            logger.info("Refreshed credentials before expiry")
+        except Exception as e:
+            logger.warning("Failed to refresh credentials: %s", e)
+            if not self._creds.valid:
+                raise AuthenticationRequiredError(
+                    "Gmail authentication required. Run: uvx gmail-mcp --setup"
+                ) from e
+            # The current token still works; don't retry on every API call
+            self._next_refresh_attempt = time.monotonic() + TOKEN_REFRESH_RETRY_INTERVAL
+
+
+# Token caches shared by the setup and server paths, keyed by token file
+_token_caches: dict[Path, TokenCache] = {}
+_token_caches_lock = threading.Lock()
+
+
+def get_token_cache(credentials_path: Path, token_path: Path) -> TokenCache:
+    """Get the shared token cache for a token file.
+
+    Args:
+        credentials_path: Path to OAuth credentials JSON.
+        token_path: Path to token cache file.
+
+    Returns:
+        The process-wide TokenCache for token_path.
+    """
+    with _token_caches_lock:
+        cache = _token_caches.get(token_path)
+        if cache is None:
+            cache = TokenCache(credentials_path, token_path)
+            _token_caches[token_path] = cache
+        return cache
 
 
 class GmailClient:
     """Gmail API client for MCP operations."""
 
-    def __init__(self, credentials_path: Path, token_path: Path) -> None:
+    def __init__(
+        self,
+        credentials_path: Path,
+        token_path: Path,
+        labels_cache_ttl: float = 60,
+    ) -> None:
         """Initialize Gmail client.
 
         Args:
             credentials_path: Path to OAuth credentials JSON.
             token_path: Path to token cache file.
+            labels_cache_ttl: Seconds to reuse the result of get_labels.
         """
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self._service = None
+        self.labels_cache_ttl = labels_cache_ttl
+        self._token_cache = get_token_cache(credentials_path, token_path)
+        self._local = threading.local()
+        self._labels_cache: tuple[float, list[dict[str, Any]]] | None = None
+        self._message_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._message_cache_lock = threading.Lock()
 
     @property
     def service(self):
-        """Get or create Gmail API service."""
-        if self._service is None:
-            creds = get_credentials(
-                self.credentials_path,
-                self.token_path,
-                interactive=False,
+        """Get or create this thread's Gmail API service with fresh credentials.
+
+        httplib2 connections are not thread-safe, so each worker thread gets
+        its own service object; all of them share the cached credentials.
+        """
+        creds = self._token_cache.get()
+        service = getattr(self._local, "service", None)
+        if service is None:
+            from googleapiclient.discovery import build
+
+            # Use the discovery document bundled with googleapiclient instead of
+            # fetching it, and skip probing for a discovery cache backend
+            service = build(
+                "gmail",
+                "v1",
+                credentials=creds,
+                static_discovery=True,
+                cache_discovery=False,
             )
-            self._service = build("gmail", "v1", credentials=creds)
-        return self._service
+            self._local.service = service
+        return service
 
     def list_unread(self, max_results: int = 20) -> list[dict[str, Any]]:
         """List unread emails from inbox.
@@ -161,7 +384,7 @@ class GmailClient:
             if not messages:
                 return []
 
-            return [self._get_message_details(msg["id"]) for msg in messages]
+            return self._get_messages_details([msg["id"] for msg in messages])
 
         except HttpError as error:
             logger.error("Gmail API error listing messages: %s", error)
@@ -195,12 +418,36 @@ class GmailClient:
             if not messages:
                 return []
 
-            return [self._get_message_details(msg["id"]) for msg in messages]
+            return self._get_messages_details([msg["id"] for msg in messages])
 
         except HttpError as error:
             logger.error("Gmail API error searching messages: %s", error)
             raise
 
+    def get_message(self, message_id: str) -> dict[str, Any]:
+        """Get a single email including a preview of its body.
+
+        Args:
+            message_id: The message ID.
+
+        Returns:
+            Email object with id, from, subject, date, snippet, labels, body_preview.
+        """
+        try:
+            message = (
+                self.service.users()
+                .messages()
+                .get(userId="me", id=message_id, format="full")
+                .execute()
+            )
+        except HttpError as error:
+            logger.error("Gmail API error getting message %s: %s", message_id, error)
+            raise
+
+        details = self._get_message_details(message)
+        details["body_preview"] = self._get_message_body(message.get("payload", {}))[:2000]
+        return details
+
     def archive_messages(self, message_ids: list[str]) -> dict[str, Any]:
         """Archive messages by removing INBOX and UNREAD labels.
 
@@ -210,25 +457,12 @@ class GmailClient:
         Returns:
             Dict with archived_count, failed_count, and details.
         """
-        results = {"archived": [], "failed": []}
-
-        for msg_id in message_ids:
-            try:
-                self.service.users().messages().modify(
-                    userId="me",
-                    id=msg_id,
-                    body={"removeLabelIds": ["INBOX", "UNREAD"]},
-                ).execute()
-                results["archived"].append(msg_id)
-                logger.info("Archived message: %s", msg_id)
-            except HttpError as error:
-                results["failed"].append({"id": msg_id, "error": str(error)})
-                logger.error("Failed to archive %s: %s", msg_id, error)
+        archived, failed = self._remove_labels(message_ids, ["INBOX", "UNREAD"], "archive")
 
         return {
-            "archived_count": len(results["archived"]),
-            "failed_count": len(results["failed"]),
-            "details": results,
+            "archived_count": len(archived),
+            "failed_count": len(failed),
+            "details": {"archived": archived, "failed": failed},
         }
 
     def mark_as_read(self, message_ids: list[str]) -> dict[str, Any]:
@@ -240,38 +474,95 @@ class GmailClient:
         Returns:
             Dict with marked_count, failed_count, and details.
         """
-        results = {"marked": [], "failed": []}
+        marked, failed = self._remove_labels(message_ids, ["UNREAD"], "mark as read")
+
+        return {
+            "marked_count": len(marked),
+            "failed_count": len(failed),
+            "details": {"marked": marked, "failed": failed},
+        }
+
+    def _remove_labels(
+        self,
+        message_ids: list[str],
+        label_ids: list[str],
+        action: str,
+    ) -> tuple[list[str], list[dict[str, str]]]:
+        """Remove labels from messages using batchModify.
+
+        If Gmail rejects a chunk because of particular IDs (400 or 404), its
+        messages are retried one at a time so the failing IDs can be reported
+        individually. Any other error, such as a rate limit or auth failure,
+        fails the whole chunk.
+
+        Args:
+            message_ids: List of message IDs to modify.
+            label_ids: Label IDs to remove.
+            action: Description of the operation for log messages.
+
+        Returns:
+            Tuple of (modified message IDs, failed entries with id and error).
+        """
+        service = self.service
+        modified: list[str] = []
+        failed: list[dict[str, str]] = []
 
-        for msg_id in message_ids:
+        for start in range(0, len(message_ids), BATCH_MODIFY_LIMIT):
+            chunk = message_ids[start : start + BATCH_MODIFY_LIMIT]
             try:
-                self.service.users().messages().modify(
+                service.users().messages().batchModify(
                     userId="me",
-                    id=msg_id,
-                    body={"removeLabelIds": ["UNREAD"]},
+                    body={"ids": chunk, "removeLabelIds": label_ids},
                 ).execute()
-                results["marked"].append(msg_id)
-                logger.info("Marked as read: %s", msg_id)
             except HttpError as error:
-                results["failed"].append({"id": msg_id, "error": str(error)})
-                logger.error("Failed to mark as read %s: %s", msg_id, error)
-
-        return {
-            "marked_count": len(results["marked"]),
-            "failed_count": len(results["failed"]),
-            "details": results,
-        }
+                if error.resp.status not in PER_MESSAGE_ERROR_STATUSES:
+                    failed.extend({"id": msg_id, "error": str(error)} for msg_id in chunk)
+                    logger.error("Failed to %s %d messages: %s", action, len(chunk), error)
+                    continue
+
+                logger.warning("Batch %s failed, retrying individually: %s", action, error)
+                for msg_id in chunk:
+                    try:
+                        service.users().messages().modify(
+                            userId="me",
+                            id=msg_id,
+                            body={"removeLabelIds": label_ids},
+                        ).execute()
+                        modified.append(msg_id)
+                    except HttpError as msg_error:
+                        failed.append({"id": msg_id, "error": str(msg_error)})
+                        logger.error("Failed to %s %s: %s", action, msg_id, msg_error)
+            else:
+                modified.extend(chunk)
+                logger.info("Completed %s for %d messages", action, len(chunk))
+
+        if modified:
+            # Label message counts and the cached messages' labels have changed
+            self._labels_cache = None
+            with self._message_cache_lock:
+                for msg_id in modified:
+                    self._message_cache.pop(msg_id, None)
+
+        return modified, failed
 
     def get_labels(self) -> list[dict[str, Any]]:
         """Get all Gmail labels for the authenticated user.
 
+        Results are cached for labels_cache_ttl seconds, or until a message's
+        labels are modified through this client.
+
         Returns:
             List of label objects with id, name, type, and counts.
         """
+        cached = self._labels_cache
+        if cached and time.monotonic() - cached[0] < self.labels_cache_ttl:
+            return cached[1]
+
         try:
             results = self.service.users().labels().list(userId="me").execute()
             labels = results.get("labels", [])
 
-            return [
+            label_list = [
                 {
                     "id": label["id"],
                     "name": label["name"],
@@ -288,71 +579,157 @@ class GmailClient:
             logger.error("Gmail API error getting labels: %s", error)
             raise
 
-    def _get_message_details(self, message_id: str) -> dict[str, Any]:
-        """Get full details for a message.
+        self._labels_cache = (time.monotonic(), label_list)
+        return label_list
+
+    def _get_messages_details(self, message_ids: list[str]) -> list[dict[str, Any]]:
+        """Fetch details for several messages using batch requests.
+
+        Messages are fetched in batches of at most MAX_BATCH_SIZE. Messages
+        that fail are retried once; any that still fail are logged and left
+        out of the results rather than failing the whole listing.
+
+        Message contents never change once delivered, so previously parsed
+        messages are served from an LRU cache and only their labels are
+        re-fetched, using the much smaller "minimal" format.
 
         Args:
-            message_id: The message ID.
+            message_ids: The message IDs to fetch.
 
         Returns:
-            Dict with message details.
+            List of message details, in the same order as message_ids, omitting
+            messages that could not be fetched.
+
+        Raises:
+            HttpError: If none of the messages could be fetched.
         """
-        message = (
-            self.service.users().messages().get(userId="me", id=message_id, format="full").execute()
-        )
+        with self._message_cache_lock:
+            cached = {
+                message_id: self._message_cache[message_id]
+                for message_id in message_ids
+                if message_id in self._message_cache
+            }
+
+        details: dict[str, dict[str, Any]] = {}
+        errors: dict[str, HttpError] = {}
+
+        def handle_response(message_id: str, response: dict, exception: HttpError | None) -> None:
+            if exception is not None:
+                errors[message_id] = exception
+            elif message_id in cached:
+                details[message_id] = {
+                    **cached[message_id],
+                    "labels": response.get("labelIds", []),
+                }
+            else:
+                details[message_id] = self._get_message_details(response)
+
+        service = self.service
+        pending = list(dict.fromkeys(message_ids))
+
+        for attempt in range(2):
+            if attempt:
+                logger.warning("Retrying %d messages that failed to fetch", len(pending))
+                time.sleep(BATCH_RETRY_DELAY)
+                errors.clear()
+
+            for start in range(0, len(pending), MAX_BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=handle_response)
+                for message_id in pending[start : start + MAX_BATCH_SIZE]:
+                    if message_id in cached:
+                        request = (
+                            service.users()
+                            .messages()
+                            .get(userId="me", id=message_id, format="minimal")
+                        )
+                    else:
+                        request = (
+                            service.users()
+                            .messages()
+                            .get(
+                                userId="me",
+                                id=message_id,
+                                format="metadata",
+                                metadataHeaders=METADATA_HEADERS,
+                            )
+                        )
+                    batch.add(request, request_id=message_id)
+                batch.execute()
+
+            pending = list(errors)
+            if not pending:
+                break
+
+        if errors:
+            if not details:
+                raise next(iter(errors.values()))
+            for message_id, error in errors.items():
+                logger.error("Failed to fetch message %s: %s", message_id, error)
+
+        results = [details[message_id] for message_id in message_ids if message_id in details]
+
+        with self._message_cache_lock:
+            for message in results:
+                self._message_cache[message["id"]] = dict(message)
+                self._message_cache.move_to_end(message["id"])
+            while len(self._message_cache) > MESSAGE_CACHE_SIZE:
+                self._message_cache.popitem(last=False)
+
+        return results
+
+    def _get_message_details(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Parse details from a fetched message resource.
 
-        headers = message.get("payload", {}).get("headers", [])
+        Args:
+            message: Message resource returned by messages().get, in
+                "metadata" or "full" format.
 
-        date_str = self._get_header(headers, "Date")
-        try:
-            parsed_date = parsedate_to_datetime(date_str)
-            date_str = parsed_date.strftime("%Y-%m-%d %H:%M")
-        except Exception:
-            pass
+        Returns:
+            Dict with message details, excluding the body.
+        """
+        payload = message.get("payload", {})
+        # Header names are case-insensitive; keep only the ones we report
+        headers = dict.fromkeys(HEADER_NAMES, "")
+        for header in payload.get("headers", []):
+            name = header["name"].lower()
+            if name in headers:
+                headers[name] = header["value"]
+
+        # Use Gmail's receive time (epoch ms) rather than the sender's Date header
+        internal_date = message.get("internalDate")
+        date_str = ""
+        if internal_date:
+            date_str = datetime.fromtimestamp(int(internal_date) / 1000).strftime("%Y-%m-%d %H:%M")
 
         return {
-            "id": message_id,
+            "id": message["id"],
             "thread_id": message.get("threadId"),
-            "from": self._get_header(headers, "From"),
-            "to": self._get_header(headers, "To"),
-            "subject": self._get_header(headers, "Subject"),
+            "from": headers["from"],
+            "to": headers["to"],
+            "subject": headers["subject"],
             "date": date_str,
             "snippet": message.get("snippet", ""),
             "labels": message.get("labelIds", []),
-            "body_preview": self._get_message_body(message.get("payload", {}))[:2000],
         }
 
-    def _get_header(self, headers: list[dict], name: str) -> str:
-        """Get header value by name (case-insensitive)."""
-        for header in headers:
-            if header["name"].lower() == name.lower():
-                return header["value"]
-        return ""
-
     def _get_message_body(self, payload: dict) -> str:
-        """Extract body text from message payload."""
-        body = ""
+        """Extract body text from message payload.
 
-        if "body" in payload and payload["body"].get("data"):
-            body = base64.urlsafe_b64decode(payload["body"]["data"]).decode(
-                "utf-8", errors="replace"
-            )
-        elif "parts" in payload:
-            for part in payload["parts"]:
-                mime_type = part.get("mimeType", "")
-                if mime_type == "text/plain" and part.get("body", {}).get("data"):
-                    body = base64.urlsafe_b64decode(part["body"]["data"]).decode(
-                        "utf-8", errors="replace"
-                    )
-                    break
-                elif mime_type == "text/html" and not body and part.get("body", {}).get("data"):
-                    body = base64.urlsafe_b64decode(part["body"]["data"]).decode(
-                        "utf-8", errors="replace"
-                    )
-                elif "parts" in part:
-                    nested_body = self._get_message_body(part)
-                    if nested_body:
-                        body = nested_body
-                        break
-
-        return body[:5000]
+        Walks the MIME tree depth-first in document order, returning the
+        first text/plain part or, failing that, the first text/html part.
+        """
+        stack = [payload]
+        html_data = None
+
+        while stack:
+            part = stack.pop()
+            body = part.get("body")
+            if body and (data := body.get("data")):
+                mime_type = part.get("mimeType")
+                if mime_type == "text/plain":
+                    return _decode_body(data)
+                if mime_type == "text/html" and html_data is None:
+                    html_data = data
+            stack.extend(reversed(part.get("parts", ())))
+
+        return _decode_body(html_data) if html_data else ""
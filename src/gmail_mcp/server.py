@@ -1,7 +1,9 @@
 """Gmail MCP Server using FastMCP."""
 
 import argparse
+import asyncio
 import sys
+from collections.abc import Callable
 from contextlib import asynccontextmanager
 from typing import Any
 
@@ -11,12 +13,25 @@ from .config import Config
 from .gmail_client import (
     AuthenticationRequiredError,
     GmailClient,
-    get_credentials,
+    get_token_cache,
 )
 
 # Global client instance (set during lifespan)
 _client: GmailClient | None = None
 
+# Maximum number of GmailClient calls running at once, to stay within Gmail quotas
+MAX_CONCURRENT_CALLS = 10
+_call_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+
+
+async def _run_client_call(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking GmailClient call in a worker thread.
+
+    Keeps the event loop free so concurrent tool calls can overlap.
+    """
+    async with _call_semaphore:
+        return await asyncio.to_thread(func, *args)
+
 
 @asynccontextmanager
 async def lifespan(mcp: FastMCP):
@@ -35,22 +50,22 @@ mcp = FastMCP(
 
 
 @mcp.tool()
-def list_unread(max_results: int = 20) -> list[dict[str, Any]]:
+async def list_unread(max_results: int = 20) -> list[dict[str, Any]]:
     """List unread emails from inbox.
 
     Args:
         max_results: Maximum number of emails to return (1-100). Default: 20.
 
     Returns:
-        List of email objects with id, from, subject, date, snippet, labels, body_preview.
+        List of email objects with id, from, subject, date, snippet, labels.
     """
     if _client is None:
         raise RuntimeError("Gmail client not initialized")
-    return _client.list_unread(max_results)
+    return await _run_client_call(_client.list_unread, max_results)
 
 
 @mcp.tool()
-def search(query: str, max_results: int = 20) -> list[dict[str, Any]]:
+async def search(query: str, max_results: int = 20) -> list[dict[str, Any]]:
     """Search emails using Gmail query syntax.
 
     Args:
@@ -63,11 +78,26 @@ def search(query: str, max_results: int = 20) -> list[dict[str, Any]]:
     """
     if _client is None:
         raise RuntimeError("Gmail client not initialized")
-    return _client.search(query, max_results)
+    return await _run_client_call(_client.search, query, max_results)
+
+
+@mcp.tool()
+async def get_message(message_id: str) -> dict[str, Any]:
+    """Get a single email including a preview of its body.
+
+    Args:
+        message_id: ID of the message, as returned by list_unread or search.
+
+    Returns:
+        Email object with id, from, subject, date, snippet, labels, body_preview.
+    """
+    if _client is None:
+        raise RuntimeError("Gmail client not initialized")
+    return await _run_client_call(_client.get_message, message_id)
 
 
 @mcp.tool()
-def archive(message_ids: list[str]) -> dict[str, Any]:
+async def archive(message_ids: list[str]) -> dict[str, Any]:
     """Archive emails by removing INBOX and UNREAD labels.
 
     Args:
@@ -78,11 +108,11 @@ def archive(message_ids: list[str]) -> dict[str, Any]:
     """
     if _client is None:
         raise RuntimeError("Gmail client not initialized")
-    return _client.archive_messages(message_ids)
+    return await _run_client_call(_client.archive_messages, message_ids)
 
 
 @mcp.tool()
-def mark_as_read(message_ids: list[str]) -> dict[str, Any]:
+async def mark_as_read(message_ids: list[str]) -> dict[str, Any]:
     """Mark emails as read without archiving.
 
     Args:
@@ -93,11 +123,11 @@ def mark_as_read(message_ids: list[str]) -> dict[str, Any]:
     """
     if _client is None:
         raise RuntimeError("Gmail client not initialized")
-    return _client.mark_as_read(message_ids)
+    return await _run_client_call(_client.mark_as_read, message_ids)
 
 
 @mcp.tool()
-def get_labels() -> list[dict[str, Any]]:
+async def get_labels() -> list[dict[str, Any]]:
     """Get all Gmail labels for the authenticated user.
 
     Returns:
@@ -105,7 +135,7 @@ def get_labels() -> list[dict[str, Any]]:
     """
     if _client is None:
         raise RuntimeError("Gmail client not initialized")
-    return _client.get_labels()
+    return await _run_client_call(_client.get_labels)
 
 
 def run_setup() -> None:
@@ -119,11 +149,7 @@ def run_setup() -> None:
     print(f"Token will be saved to: {config.token_path}", file=sys.stderr)
 
     try:
-        get_credentials(
-            config.credentials_path,
-            config.token_path,
-            interactive=True,
-        )
+        get_token_cache(config.credentials_path, config.token_path).get(interactive=True)
         print("\nAuthentication successful!", file=sys.stderr)
         print(f"Token saved to: {config.token_path}", file=sys.stderr)
         print("\nYou can now use the Gmail MCP server.", file=sys.stderr)
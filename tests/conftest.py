@@ -0,0 +1,167 @@
+"""Shared fixtures for Gmail MCP tests."""
+
+from typing import Any
+
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+
+from gmail_mcp.gmail_client import GmailClient
+
+
+def make_http_error(status: int) -> HttpError:
+    """Create an HttpError with the given HTTP status."""
+    return HttpError(Response({"status": status}), b'{"error": {"message": "fake"}}')
+
+
+def make_message(message_id: str, labels: list[str] | None = None) -> dict[str, Any]:
+    """Create a Gmail message resource in "full" format."""
+    return {
+        "id": message_id,
+        "threadId": f"thread-{message_id}",
+        "labelIds": labels if labels is not None else ["INBOX", "UNREAD"],
+        "snippet": f"Snippet of {message_id}",
+        "internalDate": "1700000000000",
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "From", "value": "sender@example.com"},
+                {"name": "To", "value": "me@example.com"},
+                {"name": "Subject", "value": f"Subject of {message_id}"},
+            ],
+            "body": {"data": "SGVsbG8="},
+        },
+    }
+
+
+class FakeRequest:
+    """Stand-in for googleapiclient.http.HttpRequest."""
+
+    def __init__(self, service: "FakeGmailService", method: str, kwargs: dict[str, Any]) -> None:
+        self.service = service
+        self.method = method
+        self.kwargs = kwargs
+
+    def execute(self) -> Any:
+        self.service.calls.append((self.method, self.kwargs))
+        return getattr(self.service, f"_handle_{self.method}")(**self.kwargs)
+
+
+class FakeBatch:
+    """Stand-in for googleapiclient.http.BatchHttpRequest."""
+
+    def __init__(self, service: "FakeGmailService", callback) -> None:
+        self.service = service
+        self.callback = callback
+        self.requests: list[tuple[str, FakeRequest]] = []
+
+    def add(self, request: FakeRequest, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        self.service.batch_sizes.append(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                response, exception = request.execute(), None
+            except HttpError as error:
+                response, exception = None, error
+            self.callback(request_id, response, exception)
+
+
+class FakeResource:
+    """Routes resource method calls (get, modify, ...) to FakeRequests."""
+
+    def __init__(self, service: "FakeGmailService", prefix: str) -> None:
+        self.service = service
+        self.prefix = prefix
+
+    def __getattr__(self, name: str):
+        return lambda **kwargs: FakeRequest(self.service, f"{self.prefix}{name}", kwargs)
+
+
+class FakeGmailService:
+    """In-memory Gmail service recording the API calls made against it.
+
+    Attributes:
+        messages_by_id: Stored message resources, keyed by ID.
+        calls: (method, kwargs) for every executed request.
+        batch_sizes: Number of requests in each executed batch.
+        batch_modify_status: If set, batchModify fails with this HTTP status.
+        get_failures: Number of times messages().get fails with 429, per ID.
+    """
+
+    def __init__(self) -> None:
+        self.messages_by_id: dict[str, dict[str, Any]] = {}
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+        self.batch_sizes: list[int] = []
+        self.batch_modify_status: int | None = None
+        self.get_failures: dict[str, int] = {}
+
+    def add_message(self, message_id: str, labels: list[str] | None = None) -> None:
+        self.messages_by_id[message_id] = make_message(message_id, labels)
+
+    def calls_to(self, method: str) -> list[dict[str, Any]]:
+        return [kwargs for name, kwargs in self.calls if name == method]
+
+    def users(self) -> "FakeGmailService":
+        return self
+
+    def messages(self) -> FakeResource:
+        return FakeResource(self, "")
+
+    def labels(self) -> FakeResource:
+        return FakeResource(self, "labels_")
+
+    def new_batch_http_request(self, callback) -> FakeBatch:
+        return FakeBatch(self, callback)
+
+    def _message(self, message_id: str) -> dict[str, Any]:
+        if message_id not in self.messages_by_id:
+            raise make_http_error(404)
+        return self.messages_by_id[message_id]
+
+    def _handle_list(self, userId: str, maxResults: int, **kwargs: Any) -> dict[str, Any]:  # noqa: N803
+        return {"messages": [{"id": message_id} for message_id in self.messages_by_id][:maxResults]}
+
+    def _handle_get(self, userId: str, id: str, format: str, **kwargs: Any) -> dict[str, Any]:  # noqa: N803
+        if self.get_failures.get(id):
+            self.get_failures[id] -= 1
+            raise make_http_error(429)
+        message = self._message(id)
+        if format == "minimal":
+            return {key: message[key] for key in ("id", "threadId", "labelIds")}
+        return message
+
+    def _handle_modify(self, userId: str, id: str, body: dict[str, Any]) -> dict[str, Any]:  # noqa: N803
+        message = self._message(id)
+        message["labelIds"] = [
+            label for label in message["labelIds"] if label not in body["removeLabelIds"]
+        ]
+        return message
+
+    def _handle_batchModify(self, userId: str, body: dict[str, Any]) -> str:  # noqa: N802, N803
+        if self.batch_modify_status is not None:
+            raise make_http_error(self.batch_modify_status)
+        if any(message_id not in self.messages_by_id for message_id in body["ids"]):
+            raise make_http_error(400)
+        for message_id in body["ids"]:
+            self._handle_modify(userId, message_id, body)
+        return ""
+
+    def _handle_labels_list(self, userId: str) -> dict[str, Any]:  # noqa: N803
+        return {"labels": [{"id": "INBOX", "name": "INBOX", "type": "system"}]}
+
+
+@pytest.fixture
+def fake_service() -> FakeGmailService:
+    """Provide an empty in-memory Gmail service."""
+    return FakeGmailService()
+
+
+@pytest.fixture
+def client(tmp_path, fake_service, monkeypatch) -> GmailClient:
+    """Provide a GmailClient wired to fake_service, bypassing OAuth."""
+    # Patch the property rather than the thread-local service so calls made
+    # from worker threads (as the MCP tools do) see the fake as well
+    monkeypatch.setattr(GmailClient, "service", property(lambda self: fake_service))
+    return GmailClient(tmp_path / "credentials.json", tmp_path / "token.json")
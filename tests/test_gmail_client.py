@@ -0,0 +1,238 @@
+"""Tests for GmailClient against a fake Gmail service."""
+
+import base64
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from gmail_mcp import gmail_client, server
+
+
+def test_archive_uses_one_batch_modify_per_chunk(client, fake_service, monkeypatch):
+    monkeypatch.setattr(gmail_client, "BATCH_MODIFY_LIMIT", 2)
+    for message_id in ("a", "b", "c"):
+        fake_service.add_message(message_id)
+
+    result = client.archive_messages(["a", "b", "c"])
+
+    assert result == {
+        "archived_count": 3,
+        "failed_count": 0,
+        "details": {"archived": ["a", "b", "c"], "failed": []},
+    }
+    assert [call["body"]["ids"] for call in fake_service.calls_to("batchModify")] == [
+        ["a", "b"],
+        ["c"],
+    ]
+    assert fake_service.calls_to("modify") == []
+
+
+def test_rejected_batch_modify_reports_failures_per_id(client, fake_service):
+    fake_service.add_message("a")
+    fake_service.add_message("c")
+
+    result = client.mark_as_read(["a", "missing", "c"])
+
+    assert result["marked_count"] == 2
+    assert result["details"]["marked"] == ["a", "c"]
+    assert [entry["id"] for entry in result["details"]["failed"]] == ["missing"]
+    assert [call["id"] for call in fake_service.calls_to("modify")] == ["a", "missing", "c"]
+
+
+def test_rate_limited_batch_modify_fails_chunk_without_fallback(client, fake_service):
+    fake_service.add_message("a")
+    fake_service.add_message("b")
+    fake_service.batch_modify_status = 429
+
+    result = client.archive_messages(["a", "b"])
+
+    assert result["archived_count"] == 0
+    assert [entry["id"] for entry in result["details"]["failed"]] == ["a", "b"]
+    assert fake_service.calls_to("modify") == []
+
+
+def test_cached_messages_refetch_only_labels(client, fake_service):
+    fake_service.add_message("a")
+    client.list_unread()
+    fake_service.messages_by_id["a"]["labelIds"] = ["INBOX"]
+    fake_service.calls.clear()
+
+    (message,) = client.list_unread()
+
+    assert [call["format"] for call in fake_service.calls_to("get")] == ["minimal"]
+    assert message["labels"] == ["INBOX"]
+    assert message["subject"] == "Subject of a"
+
+
+def test_modified_messages_are_evicted_from_cache(client, fake_service):
+    fake_service.add_message("a")
+    fake_service.add_message("b")
+    client.list_unread()
+
+    client.mark_as_read(["a"])
+    fake_service.calls.clear()
+    client.list_unread()
+
+    formats = {call["id"]: call["format"] for call in fake_service.calls_to("get")}
+    assert formats == {"a": "metadata", "b": "minimal"}
+
+
+def test_message_cache_evicts_least_recently_used(client, fake_service, monkeypatch):
+    monkeypatch.setattr(gmail_client, "MESSAGE_CACHE_SIZE", 2)
+    for message_id in ("a", "b", "c"):
+        fake_service.add_message(message_id)
+
+    client.search("in:inbox")
+
+    assert list(client._message_cache) == ["b", "c"]
+
+
+def test_decode_body_keeps_full_length_for_multibyte_text():
+    data = base64.urlsafe_b64encode("漢字".encode() * 5000).decode()
+
+    body = gmail_client._decode_body(data)
+
+    assert body == ("漢字" * 2500)[: gmail_client.MAX_BODY_CHARS]
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(gmail_client, "BATCH_RETRY_DELAY", 0)
+
+
+def test_message_failing_once_is_retried(client, fake_service, no_retry_delay):
+    fake_service.add_message("a")
+    fake_service.add_message("b")
+    fake_service.get_failures["b"] = 1
+
+    messages = client.list_unread()
+
+    assert [message["id"] for message in messages] == ["a", "b"]
+    assert [call["id"] for call in fake_service.calls_to("get")] == ["a", "b", "b"]
+
+
+def test_message_failing_twice_is_dropped(client, fake_service, no_retry_delay):
+    for message_id in ("a", "b", "c"):
+        fake_service.add_message(message_id)
+    fake_service.get_failures["b"] = 2
+
+    messages = client.list_unread()
+
+    assert [message["id"] for message in messages] == ["a", "c"]
+
+
+def test_listing_raises_when_every_message_fails(client, fake_service, no_retry_delay):
+    fake_service.add_message("a")
+    fake_service.add_message("b")
+    fake_service.get_failures.update(a=2, b=2)
+
+    with pytest.raises(HttpError):
+        client.list_unread()
+
+
+def test_messages_are_fetched_in_bounded_batches(client, fake_service, monkeypatch):
+    monkeypatch.setattr(gmail_client, "MAX_BATCH_SIZE", 2)
+    for message_id in ("a", "b", "c", "d", "e"):
+        fake_service.add_message(message_id)
+
+    messages = client.list_unread()
+
+    assert [message["id"] for message in messages] == ["a", "b", "c", "d", "e"]
+    assert fake_service.batch_sizes == [2, 2, 1]
+
+
+def encode_body(text: str) -> dict[str, str]:
+    return {"data": base64.urlsafe_b64encode(text.encode()).decode()}
+
+
+def test_message_body_prefers_first_plain_part_in_document_order(client):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {
+                "mimeType": "multipart/alternative",
+                "parts": [
+                    {"mimeType": "text/plain", "body": encode_body("MAIN BODY")},
+                    {"mimeType": "text/html", "body": encode_body("<p>MAIN BODY</p>")},
+                ],
+            },
+            {"mimeType": "text/plain", "body": encode_body("-- list footer --")},
+        ],
+    }
+
+    assert client._get_message_body(payload) == "MAIN BODY"
+
+
+def test_message_body_falls_back_to_html(client):
+    payload = {
+        "mimeType": "multipart/alternative",
+        "parts": [
+            {"mimeType": "image/png", "body": encode_body("not text")},
+            {"mimeType": "text/html", "body": encode_body("<p>first</p>")},
+            {"mimeType": "text/html", "body": encode_body("<p>second</p>")},
+        ],
+    }
+
+    assert client._get_message_body(payload) == "<p>first</p>"
+
+
+def test_message_body_of_single_part_payload(client):
+    payload = {"mimeType": "text/plain", "body": encode_body("Just text")}
+
+    assert client._get_message_body(payload) == "Just text"
+
+
+def test_message_body_skips_parts_without_data(client):
+    payload = {
+        "mimeType": "multipart/mixed",
+        "parts": [
+            {"mimeType": "text/plain", "body": {"size": 0}},
+            {"mimeType": "text/plain"},
+            {"mimeType": "text/plain", "body": encode_body("Has data")},
+        ],
+    }
+
+    assert client._get_message_body(payload) == "Has data"
+    assert client._get_message_body({"mimeType": "multipart/mixed", "body": {}}) == ""
+
+
+def test_decode_body_handles_unpadded_url_safe_data():
+    data = base64.urlsafe_b64encode("??>>ÿ~".encode()).decode().rstrip("=")
+    assert "-" in data and "_" in data and len(data) % 4
+
+    assert gmail_client._decode_body(data) == "??>>ÿ~"
+
+
+def test_decode_body_truncates_long_bodies():
+    data = base64.urlsafe_b64encode(b"x" * 100_000).decode()
+    assert len(data) > gmail_client.MAX_BODY_BASE64_CHARS
+
+    assert gmail_client._decode_body(data) == "x" * gmail_client.MAX_BODY_CHARS
+
+
+def test_get_message_returns_capped_body_preview(client, fake_service):
+    fake_service.add_message("a")
+    fake_service.messages_by_id["a"]["payload"]["body"] = encode_body("y" * 3000)
+
+    message = client.get_message("a")
+
+    assert [call["format"] for call in fake_service.calls_to("get")] == ["full"]
+    assert message["subject"] == "Subject of a"
+    assert message["body_preview"] == "y" * 2000
+
+
+def test_list_results_omit_body_preview(client, fake_service):
+    fake_service.add_message("a")
+
+    assert "body_preview" not in client.list_unread()[0]
+    assert "body_preview" not in client.search("in:inbox")[0]
+
+
+async def test_get_message_tool_delegates_to_client(client, fake_service, monkeypatch):
+    fake_service.add_message("a")
+    monkeypatch.setattr(server, "_client", client)
+
+    message = await server.get_message.fn("a")
+
+    assert message["id"] == "a"
+    assert message["body_preview"] == "Hello"
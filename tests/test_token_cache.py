@@ -0,0 +1,102 @@
+"""Tests for OAuth token caching, refresh and persistence."""
+
+import json
+import stat
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from gmail_mcp import gmail_client
+from gmail_mcp.gmail_client import TokenCache
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, matching google-auth's Credentials.expiry."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class FakeCredentials:
+    """Minimal stand-in for google.oauth2.credentials.Credentials."""
+
+    def __init__(self, expires_in: timedelta, fail_refresh: bool = False) -> None:
+        self.token = "initial-token"
+        self.refresh_token = "refresh-token"
+        self.expiry = utcnow() + expires_in
+        self.fail_refresh = fail_refresh
+        self.refresh_count = 0
+
+    @property
+    def valid(self) -> bool:
+        return self.expiry > utcnow()
+
+    def refresh(self, request) -> None:
+        self.refresh_count += 1
+        if self.fail_refresh:
+            raise RuntimeError("token endpoint unavailable")
+        self.token = f"refreshed-token-{self.refresh_count}"
+        self.expiry = utcnow() + timedelta(hours=1)
+
+    def to_json(self) -> str:
+        return json.dumps({"token": self.token})
+
+
+@pytest.fixture
+def token_path(tmp_path):
+    return tmp_path / "token.json"
+
+
+def make_cache(monkeypatch, token_path, creds: FakeCredentials) -> TokenCache:
+    monkeypatch.setattr(gmail_client, "get_credentials", lambda *args, **kwargs: creds)
+    return TokenCache(token_path.parent / "credentials.json", token_path)
+
+
+def test_token_is_written_only_when_it_changes(monkeypatch, token_path):
+    creds = FakeCredentials(expires_in=timedelta(hours=1))
+    cache = make_cache(monkeypatch, token_path, creds)
+
+    cache.get()
+    cache.get()
+    assert not token_path.exists()
+
+    creds.token = "implicitly-refreshed-token"
+    cache.get()
+    assert json.loads(token_path.read_text()) == {"token": "implicitly-refreshed-token"}
+
+
+def test_token_expiring_within_leeway_is_refreshed_and_saved(monkeypatch, token_path):
+    creds = FakeCredentials(expires_in=timedelta(seconds=60))
+    cache = make_cache(monkeypatch, token_path, creds)
+
+    assert cache.get() is creds
+    cache.get()
+
+    assert creds.refresh_count == 1
+    assert json.loads(token_path.read_text()) == {"token": "refreshed-token-1"}
+
+
+def test_failed_refresh_of_valid_token_is_not_retried_every_call(monkeypatch, token_path):
+    creds = FakeCredentials(expires_in=timedelta(seconds=60), fail_refresh=True)
+    cache = make_cache(monkeypatch, token_path, creds)
+
+    for _ in range(5):
+        assert cache.get() is creds
+
+    assert creds.refresh_count == 1
+    assert not token_path.exists()
+
+
+def test_save_token_creates_owner_only_file(token_path):
+    gmail_client._save_token(FakeCredentials(expires_in=timedelta(hours=1)), token_path)
+
+    assert stat.S_IMODE(token_path.stat().st_mode) == 0o600
+    assert list(token_path.parent.iterdir()) == [token_path]
+
+
+def test_save_token_keeps_existing_file_mode(token_path):
+    token_path.write_text("{}")
+    token_path.chmod(0o640)
+
+    gmail_client._save_token(FakeCredentials(expires_in=timedelta(hours=1)), token_path)
+
+    assert stat.S_IMODE(token_path.stat().st_mode) == 0o640
+    assert json.loads(token_path.read_text()) == {"token": "initial-token"}